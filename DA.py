@@ -3,28 +3,165 @@ import joblib
 import numpy as np
 import pandas as pd
 from sklearn.base import BaseEstimator, TransformerMixin
-from sklearn.preprocessing import LabelEncoder
 import base64
+import numbers
+import queue
+import threading
+import time
+from concurrent.futures import Future
 from pathlib import Path
 
+from _tree_walker import select_walker
+
+_COMMON_CSS = """
+        .title {
+            font-size: 40px;
+            font-weight: bold;
+            color: #1e90ff;
+            text-align: center;
+            margin-bottom: 2rem;
+        }
+        .stButton>button {
+            background-color: #1e90ff;
+            color: white;
+            font-size: 16px;
+            border-radius: 10px;
+            width: 100%;
+            transition: background-color 0.3s;
+        }
+        .stButton>button:hover {
+            background-color: #4682b4;
+        }
+        .result-text {
+            font-size: 24px;
+            font-weight: bold;
+            text-align: center;
+            margin: 2rem 0;
+        }
+        .input-section {
+            background-color: rgba(255, 255, 255, 0.9);
+            padding: 2rem;
+            border-radius: 10px;
+            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+        }
+        """
+
 class LabelEncoderTransformer(BaseEstimator, TransformerMixin):
     def fit(self, X, y=None):
-        self.encoder = LabelEncoder()
+        self.classes_ = {col: np.array(sorted(X[col].unique().tolist()), dtype=object)
+                         for col in X.columns}
         return self
 
     def transform(self, X):
-        return X.apply(self.encoder.fit_transform)
+        return pd.DataFrame({col: pd.Index(self.classes_[col], dtype=object).get_indexer(X[col])
+                             for col in X.columns}, index=X.index)
+
+@st.cache_resource
+def _load_artifacts():
+    return joblib.load('artifacts.joblib', mmap_mode='c')
+
+class PredictionBatcher:
+    """Collects rows submitted within a short window and predicts them together."""
+
+    def __init__(self, forest, window=0.005, max_batch=64):
+        self.predict_batch, self.arrays = forest
+        self.window = window
+        self.max_batch = max_batch
+        self.requests = queue.Queue()
+        threading.Thread(target=self._worker, daemon=True).start()
+
+    def submit(self, x):
+        future = Future()
+        self.requests.put((x, future))
+        return future
+
+    def _collect(self):
+        batch = [self.requests.get()]
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self.requests.get_nowait())
+            except queue.Empty:
+                break
+        # A lone request is answered at once; only wait for stragglers when
+        # other sessions are submitting concurrently.
+        if len(batch) == 1:
+            return batch
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker(self):
+        while True:
+            batch = self._collect()
+            try:
+                X = np.vstack([x for x, _ in batch])
+                labels = self.predict_batch(X, *self.arrays)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), label in zip(batch, labels):
+                future.set_result(label)
+
+@st.cache_resource
+def _get_batcher():
+    _, forest = _load_artifacts()
+    return PredictionBatcher(select_walker(forest))
+
+_RECOMMENDATIONS = {
+    "Insomnia": [
+        "Maintain a consistent sleep schedule",
+        "Create a relaxing bedtime routine",
+        "Avoid screens before bedtime",
+        "Consider consulting a sleep specialist"
+    ],
+    "Sleep Apnea": [
+        "Sleep on your side instead of your back",
+        "Maintain a healthy weight",
+        "Consider using a CPAP machine",
+        "Consult a healthcare provider for proper diagnosis"
+    ],
+    "No Disorder": [
+        "Continue maintaining good sleep habits",
+        "Stay physically active",
+        "Monitor sleep quality regularly",
+        "Practice stress management"
+    ]
+}
+
+@st.cache_data
+def _rec_html(disorder: str) -> str:
+    return "### Recommendations:\n" + "\n".join(f"- {r}" for r in _RECOMMENDATIONS[disorder])
+
+@st.cache_data
+def _encoded_bg(path: str) -> str | None:
+    bg_path = Path(path)
+    if not bg_path.exists():
+        return None
+    with open(bg_path, "rb") as image_file:
+        return base64.b64encode(image_file.read()).decode()
 
 class SleepDisorderApp:
+    _RESULT_TITLE_HTML = "<div class='result-text'>Prediction Result</div>\n"
+    _RESULT_HTML_TEMPLATE = ('<p style="color:%s;font-size:24px;text-align:center;'
+                             'font-weight:bold;">%s</p>')
+
     def __init__(self):
         self.load_models()
         self.setup_constants()
-        self.setup_style()
 
     def load_models(self):
         try:
-            self.model = joblib.load('sleep_disorder_random_forest_model.pkl')
-            self.preprocessor = joblib.load('preprocessor.pkl')
+            self.preprocessor, forest = _load_artifacts()
+            self.classes = forest['classes']
+            self.feature_names = list(self.preprocessor.feature_names_in_)
         except FileNotFoundError as e:
             st.error(f"Error loading model files: {e}")
             st.stop()
@@ -33,6 +170,20 @@ class SleepDisorderApp:
         self.OCCUPATIONS = ['Others', 'Doctor', 'Teacher', 'Nurse', 'Engineer', 
                            'Accountant', 'Lawyer', 'Salesperson']
         self.BMI_CATEGORIES = ['Normal Weight', 'Overweight', 'Obese']
+        # Label-encoded columns only accept levels seen in training; anything
+        # else would encode to -1 and sort below every real level.
+        encoder = self.preprocessor.named_transformers_['cat']
+        self.CATEGORICAL_SETS = {col: set(levels) for col, levels in encoder.classes_.items()}
+        # Bounds of the numeric widgets, also enforced by validate_input.
+        # Label-encoded columns are offered as CATEGORICAL_SETS options instead.
+        self.NUMERIC_RANGES = {
+            'Age': {'min_value': 18, 'max_value': 100},
+            'Sleep Duration': {'min_value': 0.0, 'max_value': 24.0},
+            'Systolic': {'min_value': 70, 'max_value': 200},
+            'Diastolic': {'min_value': 40, 'max_value': 130},
+            'Heart Rate': {'min_value': 40, 'max_value': 200},
+            'Daily Steps': {'min_value': 0, 'max_value': 50000}
+        }
         self.DISORDER_MAPPING = {
             0.0: ("Insomnia", "red"),
             1.0: ("No Disorder", "green"),
@@ -41,10 +192,8 @@ class SleepDisorderApp:
 
     def setup_style(self):
         try:
-            bg_path = Path("Background.jpg")
-            if bg_path.exists():
-                with open(bg_path, "rb") as image_file:
-                    encoded_string = base64.b64encode(image_file.read()).decode()
+            encoded_string = _encoded_bg("Background.jpg")
+            if encoded_string is not None:
                 self.set_background_style(encoded_string)
             else:
                 self.set_default_style()
@@ -61,7 +210,7 @@ class SleepDisorderApp:
             background-position: center;
             background-repeat: no-repeat;
         }}
-        {self.get_common_styles()}
+        {_COMMON_CSS}
         </style>
         """, unsafe_allow_html=True)
 
@@ -71,159 +220,125 @@ class SleepDisorderApp:
         body {{
             background-color: #f0f2f6;
         }}
-        {self.get_common_styles()}
+        {_COMMON_CSS}
         </style>
         """, unsafe_allow_html=True)
 
-    def get_common_styles(self):
-        return """
-        .title {
-            font-size: 40px;
-            font-weight: bold;
-            color: #1e90ff;
-            text-align: center;
-            margin-bottom: 2rem;
-        }
-        .stButton>button {
-            background-color: #1e90ff;
-            color: white;
-            font-size: 16px;
-            border-radius: 10px;
-            width: 100%;
-            transition: background-color 0.3s;
-        }
-        .stButton>button:hover {
-            background-color: #4682b4;
-        }
-        .result-text {
-            font-size: 24px;
-            font-weight: bold;
-            text-align: center;
-            margin: 2rem 0;
-        }
-        .input-section {
-            background-color: rgba(255, 255, 255, 0.9);
-            padding: 2rem;
-            border-radius: 10px;
-            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-        }
-        """
+    def validate_input(self, data):
+        for name, allowed in self.CATEGORICAL_SETS.items():
+            if data.get(name) not in allowed:
+                return f"{name} must be one of {sorted(allowed)}, got {data.get(name)!r}"
+        for name, bounds in self.NUMERIC_RANGES.items():
+            low = bounds.get('min_value', float('-inf'))
+            high = bounds.get('max_value', float('inf'))
+            value = data.get(name)
+            if not isinstance(value, numbers.Real) or not low <= value <= high:
+                return f"{name} must be between {low} and {high}, got {value!r}"
+        return None
 
     def preprocess_input(self, data):
+        error = self.validate_input(data)
+        if error is not None:
+            st.error(f"Error in preprocessing: {error}")
+            return None
         try:
-            data['Sleep Duration Sqrt'] = np.sqrt(data['Sleep Duration'])
-            data = data.drop(columns=['Sleep Duration'])
-            return self.preprocessor.transform(data)
+            row = np.array([[data[name] for name in self.feature_names]], dtype=object)
+            return self.preprocessor.transform(pd.DataFrame(row, columns=self.feature_names))
         except Exception as e:
             st.error(f"Error in preprocessing: {e}")
             return None
 
+    def predict(self, processed_data):
+        future = _get_batcher().submit(processed_data.astype(np.float32))
+        return self.classes[[future.result()]]
+
     def get_user_input(self):
         with st.form(key='input_form'):
             col1, col2 = st.columns(2)
             
             with col1:
                 gender = st.selectbox('Gender', ['Male', 'Female'])
-                age = st.number_input('Age', min_value=18, max_value=100, value=30,
+                age = st.number_input('Age', **self.NUMERIC_RANGES['Age'], value=30,
                                     help="Enter your age (18-100 years)")
                 sleep_duration = st.number_input('Sleep Duration (hours)', 
-                                               min_value=0.0, max_value=24.0, value=7.5,
+                                               **self.NUMERIC_RANGES['Sleep Duration'], value=7.5,
                                                help="Average sleep duration in hours")
                 occupation = st.selectbox('Occupation', self.OCCUPATIONS)
-                quality_of_sleep = st.slider('Quality of Sleep', 1, 10, 7,
-                                           help="Rate your sleep quality (1-10)")
-                physical_activity = st.number_input('Physical Activity (minutes/day)',
-                                                  min_value=0, value=30,
-                                                  help="Daily physical activity duration")
+                quality_options = sorted(self.CATEGORICAL_SETS['Quality of Sleep'])
+                quality_of_sleep = st.select_slider('Quality of Sleep', options=quality_options, value=7,
+                                                  help=f"Rate your sleep quality "
+                                                       f"({quality_options[0]}-{quality_options[-1]})")
+                physical_activity = st.select_slider('Physical Activity (minutes/day)',
+                                                   options=sorted(self.CATEGORICAL_SETS['Physical Activity Level']),
+                                                   value=30,
+                                                   help="Daily physical activity duration, "
+                                                        "rounded to the nearest listed value")
 
             with col2:
-                stress_level = st.slider('Stress Level', 1, 10, 5,
-                                       help="Rate your stress level (1-10)")
+                stress_options = sorted(self.CATEGORICAL_SETS['Stress Level'])
+                stress_level = st.select_slider('Stress Level', options=stress_options, value=5,
+                                              help=f"Rate your stress level "
+                                                   f"({stress_options[0]}-{stress_options[-1]})")
                 bmi_category = st.selectbox('BMI Category', self.BMI_CATEGORIES)
                 systolic = st.number_input('Systolic Blood Pressure',
-                                         min_value=70, max_value=200, value=120,
+                                         **self.NUMERIC_RANGES['Systolic'], value=120,
                                          help="Upper blood pressure number")
                 diastolic = st.number_input('Diastolic Blood Pressure',
-                                          min_value=40, max_value=130, value=80,
+                                          **self.NUMERIC_RANGES['Diastolic'], value=80,
                                           help="Lower blood pressure number")
                 heart_rate = st.number_input('Heart Rate (bpm)',
-                                           min_value=40, max_value=200, value=70,
+                                           **self.NUMERIC_RANGES['Heart Rate'], value=70,
                                            help="Resting heart rate in beats per minute")
                 daily_steps = st.number_input('Daily Steps',
-                                            min_value=0, max_value=50000, value=10000,
+                                            **self.NUMERIC_RANGES['Daily Steps'], value=10000,
                                             help="Average number of steps per day")
 
             submit_button = st.form_submit_button(label='Predict Sleep Disorder')
             
             return submit_button, {
-                'Gender': [gender],
-                'Age': [age],
-                'Sleep Duration': [sleep_duration],
-                'Occupation': [occupation],
-                'Quality of Sleep': [quality_of_sleep],
-                'Physical Activity Level': [physical_activity],
-                'Stress Level': [stress_level],
-                'BMI Category': [bmi_category],
-                'Systolic': [systolic],
-                'Diastolic': [diastolic],
-                'Heart Rate': [heart_rate],
-                'Daily Steps': [daily_steps]
+                'Gender': gender,
+                'Age': age,
+                'Sleep Duration': sleep_duration,
+                'Occupation': occupation,
+                'Quality of Sleep': quality_of_sleep,
+                'Physical Activity Level': physical_activity,
+                'Stress Level': stress_level,
+                'BMI Category': bmi_category,
+                'Systolic': systolic,
+                'Diastolic': diastolic,
+                'Heart Rate': heart_rate,
+                'Daily Steps': daily_steps
             }
 
     def display_prediction(self, prediction):
         if prediction is not None:
             disorder, color = self.DISORDER_MAPPING.get(prediction[0], ("Unknown", "gray"))
-            st.markdown("<div class='result-text'>Prediction Result</div>",
-                       unsafe_allow_html=True)
-            st.markdown(f'<p style="color:{color};font-size:24px;text-align:center;'
-                       f'font-weight:bold;">{disorder}</p>', unsafe_allow_html=True)
-            
-            self.display_recommendations(disorder)
-
-    def display_recommendations(self, disorder):
-        recommendations = {
-            "Insomnia": [
-                "Maintain a consistent sleep schedule",
-                "Create a relaxing bedtime routine",
-                "Avoid screens before bedtime",
-                "Consider consulting a sleep specialist"
-            ],
-            "Sleep Apnea": [
-                "Sleep on your side instead of your back",
-                "Maintain a healthy weight",
-                "Consider using a CPAP machine",
-                "Consult a healthcare provider for proper diagnosis"
-            ],
-            "No Disorder": [
-                "Continue maintaining good sleep habits",
-                "Stay physically active",
-                "Monitor sleep quality regularly",
-                "Practice stress management"
-            ]
-        }
-        
-        if disorder in recommendations:
-            st.markdown("### Recommendations:")
-            for rec in recommendations[disorder]:
-                st.markdown(f"- {rec}")
+            html = self._RESULT_TITLE_HTML + self._RESULT_HTML_TEMPLATE % (color, disorder)
+            if disorder in _RECOMMENDATIONS:
+                # Blank line ends the HTML block so the recommendations render as markdown.
+                html += "\n\n" + _rec_html(disorder)
+            st.markdown(html, unsafe_allow_html=True)
 
     def run(self):
+        self.setup_style()
         st.markdown('<p class="title">Sleep Disorder Detection</p>', unsafe_allow_html=True)
         
         submit_button, input_data = self.get_user_input()
         
         if submit_button:
             with st.spinner("Analyzing sleep patterns..."):
-                input_df = pd.DataFrame(input_data)
-                processed_data = self.preprocess_input(input_df)
+                processed_data = self.preprocess_input(input_data)
                 
                 if processed_data is not None:
                     try:
-                        prediction = self.model.predict(processed_data)
+                        prediction = self.predict(processed_data)
                         self.display_prediction(prediction)
                     except Exception as e:
                         st.error(f"Error making prediction: {e}")
 
+@st.cache_resource
+def get_app():
+    return SleepDisorderApp()
+
 if __name__ == "__main__":
-    app = SleepDisorderApp()
-    app.run()
\ No newline at end of file
+    get_app().run()
\ No newline at end of file
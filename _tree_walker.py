@@ -0,0 +1,85 @@
+import numpy as np
+from numba import njit
+
+# Explicit signatures compile eagerly at import; cache=True persists the machine
+# code next to this module so later processes load it instead of re-running the JIT.
+_SPLITS = "int32[:,::1], float32[:,::1], int32[:,::1], int32[:,::1]"
+_PREDICT_ONE = f"int64(float32[::1], {_SPLITS}, float64[:,:,::1])"
+_PREDICT_BATCH = f"int64[::1](float32[:,::1], {_SPLITS}, float64[:,:,::1])"
+_VOTE_ONE = f"int64(float32[::1], {_SPLITS}, int8[:,::1])"
+_VOTE_BATCH = f"int64[::1](float32[:,::1], {_SPLITS}, int8[:,::1])"
+
+@njit(_PREDICT_ONE, cache=True, nogil=True)
+def predict_one(x, feature, threshold, left, right, value):
+    votes = np.zeros(value.shape[2])
+    for t in range(feature.shape[0]):
+        n = 0
+        while left[t, n] != -1:
+            if x[feature[t, n]] <= threshold[t, n]:
+                n = left[t, n]
+            else:
+                n = right[t, n]
+        votes += value[t, n]
+    return np.argmax(votes)
+
+@njit(_PREDICT_BATCH, cache=True, nogil=True)
+def predict_batch(X, feature, threshold, left, right, value):
+    out = np.empty(X.shape[0], dtype=np.int64)
+    for i in range(X.shape[0]):
+        out[i] = predict_one(X[i], feature, threshold, left, right, value)
+    return out
+
+@njit(_VOTE_ONE, cache=True, nogil=True)
+def vote_one(x, feature, threshold, left, right, leaf_class):
+    votes = np.zeros(128, dtype=np.int64)  # one slot per possible int8 class id
+    for t in range(feature.shape[0]):
+        n = 0
+        while left[t, n] != -1:
+            if x[feature[t, n]] <= threshold[t, n]:
+                n = left[t, n]
+            else:
+                n = right[t, n]
+        votes[leaf_class[t, n]] += 1
+    return np.argmax(votes)
+
+@njit(_VOTE_BATCH, cache=True, nogil=True)
+def vote_batch(X, feature, threshold, left, right, leaf_class):
+    out = np.empty(X.shape[0], dtype=np.int64)
+    for i in range(X.shape[0]):
+        out[i] = vote_one(X[i], feature, threshold, left, right, leaf_class)
+    return out
+
+def flatten_forest(model):
+    trees = [est.tree_ for est in model.estimators_]
+    shape = (len(trees), max(tree.node_count for tree in trees))
+    feature = np.zeros(shape, dtype=np.int32)
+    threshold = np.zeros(shape, dtype=np.float32)
+    left = np.full(shape, -1, dtype=np.int32)
+    right = np.full(shape, -1, dtype=np.int32)
+    value = np.zeros(shape + (len(model.classes_),))
+    for t, tree in enumerate(trees):
+        n = tree.node_count
+        feature[t, :n] = tree.feature
+        # Round down so that float32 x <= threshold agrees with the float64 split.
+        thr = tree.threshold.astype(np.float32)
+        threshold[t, :n] = np.where(thr > tree.threshold,
+                                    np.nextafter(thr, np.float32(-np.inf)), thr)
+        left[t, :n] = tree.children_left
+        right[t, :n] = tree.children_right
+        proba = tree.value[:, 0, :]
+        value[t, :n] = proba / proba.sum(axis=1, keepdims=True)
+    forest = {'classes': model.classes_, 'feature': feature, 'threshold': threshold,
+              'left': left, 'right': right}
+    # With pure leaves every tree casts a single class vote, so the averaged
+    # probabilities reduce to vote counts.
+    if np.all((value[left == -1] > 0).sum(axis=1) <= 1):
+        forest['leaf_class'] = value.argmax(axis=2).astype(np.int8)
+    else:
+        forest['value'] = value
+    return forest
+
+def select_walker(forest):
+    splits = (forest['feature'], forest['threshold'], forest['left'], forest['right'])
+    if 'leaf_class' in forest:
+        return vote_batch, splits + (forest['leaf_class'],)
+    return predict_batch, splits + (forest['value'],)
@@ -0,0 +1,123 @@
+"""Rebuild artifacts.joblib from the trained model and preprocessor.
+
+Run from the repository root:
+
+    python build_artifacts.py
+
+Inputs are the pickles produced by training (sleep_disorder_random_forest_model.pkl
+and preprocessor.pkl). The output bundles the inference preprocessor with the
+forest flattened for the compiled tree walker.
+"""
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, RobustScaler
+
+import DA
+from _tree_walker import flatten_forest
+
+MODEL_PATH = 'sleep_disorder_random_forest_model.pkl'
+PREPROCESSOR_PATH = 'preprocessor.pkl'
+OUTPUT_PATH = 'artifacts.joblib'
+
+# Values of the label-encoded columns in the training data
+# (Sleep_health_and_lifestyle_dataset.csv, occupations grouped as in the app).
+# The trained encoder pickle does not keep them, so they are listed here and
+# checked against the number of codes the forest splits on.
+TRAINING_CATEGORIES = {
+    'Occupation': ['Others', 'Doctor', 'Teacher', 'Nurse', 'Engineer',
+                   'Accountant', 'Lawyer', 'Salesperson'],
+    'Quality of Sleep': [4, 5, 6, 7, 8, 9],
+    'Gender': ['Male', 'Female'],
+    'Physical Activity Level': [30, 32, 35, 40, 42, 45, 47, 50, 55, 60, 65, 70,
+                                75, 80, 85, 90],
+    'Stress Level': [3, 4, 5, 6, 7, 8],
+    'BMI Category': ['Normal Weight', 'Overweight', 'Obese'],
+}
+
+# Raw form columns, in the order get_user_input returns them.
+INPUT_COLUMNS = ['Gender', 'Age', 'Sleep Duration', 'Occupation', 'Quality of Sleep',
+                 'Physical Activity Level', 'Stress Level', 'BMI Category',
+                 'Systolic', 'Diastolic', 'Heart Rate', 'Daily Steps']
+
+
+def check_categories(model):
+    names = list(model.feature_names_in_)
+    for col, levels in TRAINING_CATEGORIES.items():
+        f = names.index(col)
+        top = max(est.tree_.threshold[est.tree_.feature == f].max()
+                  for est in model.estimators_ if (est.tree_.feature == f).any())
+        # Splits between codes 0..k-1 end up between k-2 and k-1.
+        if not len(levels) - 2 < top < len(levels) - 1:
+            raise ValueError(f"{col}: {len(levels)} levels do not match forest splits "
+                             f"(highest threshold {top:.3f})")
+
+
+def build_preprocessor(trained):
+    scaler = trained.named_transformers_['num']
+    scaled = list(scaler.feature_names_in_)
+    cat_cols = [cols for name, _, cols in trained.transformers_ if name == 'cat'][0]
+    if scaled != ['Age', 'Sleep Duration Sqrt', 'Heart Rate', 'Daily Steps',
+                  'Systolic', 'Diastolic']:
+        raise ValueError(f"Unexpected numeric columns: {scaled}")
+
+    # A frame that contains every training level fits the label encoder to the
+    # same sorted codes; the numeric scalers get their trained parameters below.
+    n = max(len(levels) for levels in TRAINING_CATEGORIES.values())
+    frame = pd.DataFrame({
+        col: ([TRAINING_CATEGORIES[col][i % len(TRAINING_CATEGORIES[col])] for i in range(n)]
+              if col in TRAINING_CATEGORIES else np.linspace(1.0, 2.0, n))
+        for col in INPUT_COLUMNS
+    })
+    preprocessor = ColumnTransformer([
+        ('age', RobustScaler(), ['Age']),
+        ('sleep_sqrt', Pipeline([
+            ('sqrt', FunctionTransformer(np.sqrt, validate=True,
+                                         feature_names_out='one-to-one')),
+            ('scale', RobustScaler()),
+        ]), ['Sleep Duration']),
+        ('num', RobustScaler(), ['Heart Rate', 'Daily Steps', 'Systolic', 'Diastolic']),
+        ('cat', DA.LabelEncoderTransformer(), cat_cols),
+    ]).fit(frame)
+
+    # The trained RobustScaler covered all six numeric columns at once; split
+    # its center_/scale_ across the three groups, keeping the forest's order.
+    for fitted, columns in ((preprocessor.named_transformers_['age'], slice(0, 1)),
+                            (preprocessor.named_transformers_['sleep_sqrt'].named_steps['scale'],
+                             slice(1, 2)),
+                            (preprocessor.named_transformers_['num'], slice(2, 6))):
+        fitted.center_ = scaler.center_[columns].copy()
+        fitted.scale_ = scaler.scale_[columns].copy()
+    return preprocessor, frame
+
+
+def check_numeric(trained, preprocessor, frame):
+    legacy = frame.drop(columns=['Sleep Duration']).assign(
+        **{'Sleep Duration Sqrt': np.sqrt(frame['Sleep Duration'])})
+    expected = trained.named_transformers_['num'].transform(
+        legacy[trained.named_transformers_['num'].feature_names_in_])
+    if not np.allclose(preprocessor.transform(frame)[:, :6].astype(float), expected):
+        raise ValueError("Rebuilt numeric scaling differs from the trained preprocessor")
+
+
+def main():
+    # Streamlit runs DA.py as __main__, and the pickles refer to the encoder as
+    # __main__.LabelEncoderTransformer, so publish DA's class under that name.
+    DA.LabelEncoderTransformer.__module__ = '__main__'
+    sys.modules['__main__'].LabelEncoderTransformer = DA.LabelEncoderTransformer
+
+    model = joblib.load(MODEL_PATH)
+    trained = joblib.load(PREPROCESSOR_PATH)
+    check_categories(model)
+    preprocessor, frame = build_preprocessor(trained)
+    check_numeric(trained, preprocessor, frame)
+    joblib.dump((preprocessor, flatten_forest(model)), OUTPUT_PATH, compress=0)
+    print(f"Wrote {OUTPUT_PATH}")
+
+
+if __name__ == '__main__':
+    main()